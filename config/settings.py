@@ -210,10 +210,23 @@ MEDIA_ALLOWED_CONTENT_TYPES = [
     'text/plain', 'application/pdf'
 ]
 
+# Caches. Throttle counters get their own per-process local-memory cache so
+# rate checks never wait on a remote cache; limits are then per worker,
+# which is acceptable for throttling.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+    },
+}
+
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
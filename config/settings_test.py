@@ -2,6 +2,10 @@
 # Inherits from main settings and overrides for test stability
 
 from .settings import *
+import hashlib
+import os
+import sys
+import tempfile
 
 # Disable throttling completely for tests
 REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES'] = []
@@ -16,13 +20,24 @@ REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] = {
 # Faster password validation for tests
 AUTH_PASSWORD_VALIDATORS = []
 
-# Use in-memory database for speed
+# Under pytest the test database is a file on tmpfs (/dev/shm where
+# available) so --reuse-db can keep the schema between runs without touching
+# disk. The file name is derived from this checkout's path so other checkouts
+# and concurrent CI jobs on the same host don't share it; TEST_DB_DIR
+# overrides the directory. `manage.py test` keeps Django's default in-memory
+# test database, so it never prompts about pytest's reused file.
+TEST_DB_DIR = os.environ.get('TEST_DB_DIR') or ('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir())
+TEST_DB_NAME = 'social_test_%s.sqlite3' % hashlib.sha1(str(BASE_DIR).encode()).hexdigest()[:12]
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
+        # Never opened: tests run against the TEST database
         'NAME': ':memory:',
+        'TEST': {},
     }
 }
+if 'pytest' in sys.modules:
+    DATABASES['default']['TEST']['NAME'] = os.path.join(TEST_DB_DIR, TEST_DB_NAME)
 
 # Disable logging during tests
 LOGGING = {
@@ -38,23 +53,15 @@ LOGGING = {
     },
 }
 
-# Fast password hashing for tests
+# Fast password hashing for tests. MD5PasswordHasher is the cheapest hasher
+# left in Django 5.x (UnsaltedMD5PasswordHasher was removed in 5.1).
 PASSWORD_HASHERS = [
     'django.contrib.auth.hashers.MD5PasswordHasher',
 ]
 
-# Disable migrations for faster test setup
-class DisableMigrations:
-    def __contains__(self, item):
-        return True
-    
-    def __getitem__(self, item):
-        return None
-
-MIGRATION_MODULES = DisableMigrations()
-
-# Test-specific media settings
-MEDIA_ROOT = '/tmp/test_media'
+# Test-specific media settings; one directory per pytest-xdist worker so
+# parallel runs don't collide on upload names
+MEDIA_ROOT = os.path.join('/tmp/test_media', os.environ.get('PYTEST_XDIST_WORKER', 'main'))
 
 # Reduce SimpleJWT token lifetimes for faster tests
 from datetime import timedelta
@@ -0,0 +1,46 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from rest_framework.test import APIClient
+
+
+User = get_user_model()
+
+API_USER_EMAIL = 'api-user@example.com'
+API_USER_PASSWORD = 'demopass123'
+
+
+def _fast_sqlite_pragmas(sender, connection, **kwargs):
+    """Trade durability for speed; the test database is disposable."""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=MEMORY')
+            cursor.execute('PRAGMA synchronous=OFF')
+
+
+def pytest_configure(config):
+    connection_created.connect(_fast_sqlite_pragmas)
+
+
+@pytest.fixture(scope='module')
+def api_user(django_db_setup, django_db_blocker):
+    """Create one user (with profile) shared by every test in a module."""
+    with django_db_blocker.unblock():
+        user = User.objects.create_user(email=API_USER_EMAIL, password=API_USER_PASSWORD, display_name='Demo User')
+    yield user
+    with django_db_blocker.unblock():
+        user.delete()
+
+
+@pytest.fixture
+def api_client():
+    """Unauthenticated DRF test client."""
+    return APIClient()
+
+
+@pytest.fixture(scope='module')
+def auth_client(api_user):
+    """DRF test client authenticated as `api_user`, bypassing JWT checks."""
+    client = APIClient()
+    client.force_authenticate(user=api_user)
+    return client
@@ -1,7 +1,10 @@
 # Social account adapters for customizing allauth behavior
 from allauth.socialaccount.adapter import DefaultSocialAccountAdapter
 from allauth.account.utils import user_field
+from allauth.core.exceptions import ImmediateHttpResponse
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.http import HttpResponseBadRequest
 
 User = get_user_model()
 
@@ -24,14 +27,21 @@ class SocialAccountAdapter(DefaultSocialAccountAdapter):
             return
         
         email = sociallogin.account.extra_data.get('email')
+        # Check if user with this email already exists. The full row is
+        # loaded on purpose: login reads password/is_active/last_login, and
+        # deferring them with only() would cost a query per field later.
         try:
-            # Check if user with this email already exists
-            existing_user = User.objects.get(email=email)
-            # Link the social account to existing user
-            sociallogin.connect(request, existing_user)
+            existing_user = User.objects.get(email__lower=email.lower())
         except User.DoesNotExist:
-            # No existing user, will create new one
-            pass
+            return
+        except User.MultipleObjectsReturned:
+            # Registration used to be case-sensitive, so several accounts may
+            # differ only by case; refuse rather than link an arbitrary one
+            raise ImmediateHttpResponse(HttpResponseBadRequest(
+                'Several accounts match this email; sign in with your password.'
+            ))
+        # Link the social account to existing user
+        sociallogin.connect(request, existing_user)
     
     def populate_user(self, request, sociallogin, data):
         """
@@ -59,11 +69,12 @@ class SocialAccountAdapter(DefaultSocialAccountAdapter):
     def save_user(self, request, sociallogin, form=None):
         """
         Save the user and ensure profile is created.
+        User, social account and profile are committed in one transaction.
         """
-        user = super().save_user(request, sociallogin, form)
-        
-        # Ensure profile exists (should be created by signal, but double-check)
-        if not hasattr(user, 'profile'):
+        with transaction.atomic():
+            user = super().save_user(request, sociallogin, form)
+            
+            # Ensure profile exists in one lookup; no reverse-accessor probe
             from .models import Profile
             extra_data = sociallogin.account.extra_data
             
@@ -74,10 +85,9 @@ class SocialAccountAdapter(DefaultSocialAccountAdapter):
             if not display_name:
                 display_name = user.email.split('@')[0]
             
-            Profile.objects.create(
+            Profile.objects.get_or_create(
                 user=user,
-                display_name=display_name,
-                bio='',
+                defaults={'display_name': display_name, 'bio': ''},
             )
         
         return user
\ No newline at end of file
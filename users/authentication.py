@@ -0,0 +1,39 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+# Upper bound on how long a verified token is trusted without re-checking
+# its signature; entries never outlive the token's own expiry
+JWT_VALIDATION_CACHE_SECONDS = 3600
+
+
+def _cache_key(raw_token):
+    if isinstance(raw_token, str):
+        raw_token = raw_token.encode()
+    return 'jwt-validated:' + hashlib.blake2b(raw_token, digest_size=16).hexdigest()
+
+
+def forget_token(raw_token):
+    """Drop a token's cached validation, e.g. when its session is revoked."""
+    cache.delete(_cache_key(raw_token))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that remembers validated tokens under a hash of the
+    raw token, so repeat requests with the same token skip signature
+    verification. The user is still loaded on every request.
+    """
+
+    def get_validated_token(self, raw_token):
+        key = _cache_key(raw_token)
+        token = cache.get(key)
+        if token is not None:
+            return token
+        token = super().get_validated_token(raw_token)
+        timeout = min(token.get('exp', 0) - int(time.time()), JWT_VALIDATION_CACHE_SECONDS)
+        if timeout > 0:
+            cache.set(key, token, timeout)
+        return token
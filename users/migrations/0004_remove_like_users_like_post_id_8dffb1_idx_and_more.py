@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-15 01:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_media_height_media_width'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='like',
+            name='users_like_post_id_8dffb1_idx',
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', '-created_at'], name='users_comme_post_id_a8c17c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='like',
+            index=models.Index(fields=['user', '-created_at'], name='users_like_user_id_bf796a_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_post_counters(apps, schema_editor):
+    Post = apps.get_model('users', 'Post')
+    Like = apps.get_model('users', 'Like')
+    Comment = apps.get_model('users', 'Comment')
+
+    likes = (Like.objects.filter(post=OuterRef('pk')).order_by()
+             .values('post').annotate(total=Count('pk')).values('total'))
+    comments = (Comment.objects.filter(post=OuterRef('pk')).order_by()
+                .values('post').annotate(total=Count('pk')).values('total'))
+    Post.objects.update(
+        likes_count=Coalesce(Subquery(likes), 0),
+        comments_count=Coalesce(Subquery(comments), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_post_comments_count_post_likes_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_post_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-15 01:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_backfill_post_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profile',
+            name='avatar',
+            field=models.FileField(blank=True, null=True, upload_to='avatars/'),
+        ),
+    ]
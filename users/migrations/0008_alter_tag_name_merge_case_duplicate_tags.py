@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-15 01:56
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+def merge_case_duplicate_tags(apps, schema_editor):
+    """
+    Tags used to be unique case-sensitively, so 'Django' and 'django' may
+    both exist. Keep the oldest of each group, repoint the others' post links
+    to it, and delete them so 0009 can add the case-insensitive constraint.
+    """
+    Tag = apps.get_model('users', 'Tag')
+    Through = apps.get_model('users', 'Post').tags.through
+
+    groups = {}
+    for tag_id, key in Tag.objects.annotate(key=Lower('name')).order_by('id').values_list('id', 'key'):
+        groups.setdefault(key, []).append(tag_id)
+
+    for keep, *duplicates in groups.values():
+        if not duplicates:
+            continue
+        linked = set(Through.objects.filter(tag_id=keep).values_list('post_id', flat=True))
+        for row in Through.objects.filter(tag_id__in=duplicates).order_by('id'):
+            if row.post_id in linked:
+                # The post already carries the surviving tag
+                row.delete()
+            else:
+                row.tag_id = keep
+                row.save(update_fields=['tag'])
+                linked.add(row.post_id)
+        Tag.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_alter_profile_avatar'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tag',
+            name='name',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.RunPython(merge_case_duplicate_tags, migrations.RunPython.noop),
+    ]
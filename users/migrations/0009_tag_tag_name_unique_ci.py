@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-15 01:56
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Separate from 0008 so the index is built in a fresh transaction: on
+    # PostgreSQL the tags deleted there leave deferred FK trigger events
+    # pending on users_tag, and CREATE INDEX refuses to run alongside them.
+
+    dependencies = [
+        ('users', '0008_alter_tag_name_merge_case_duplicate_tags'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='tag_name_unique_ci'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-15 02:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_customuser_user_email_lower_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='cached_url',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+    ]
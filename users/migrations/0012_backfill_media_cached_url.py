@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def backfill_media_cached_url(apps, schema_editor):
+    Media = apps.get_model('users', 'Media')
+
+    pending = []
+    for media in Media.objects.filter(cached_url='').exclude(file='').iterator():
+        media.cached_url = media.file.url
+        pending.append(media)
+        if len(pending) >= 500:
+            Media.objects.bulk_update(pending, ['cached_url'])
+            pending = []
+    if pending:
+        Media.objects.bulk_update(pending, ['cached_url'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_media_cached_url'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_media_cached_url, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def backfill_missing_profiles(apps, schema_editor):
+    User = apps.get_model('users', 'CustomUser')
+    Profile = apps.get_model('users', 'Profile')
+
+    pending = []
+    for user_id, email in User.objects.filter(profile__isnull=True).values_list('id', 'email').iterator():
+        pending.append(Profile(user_id=user_id, display_name=email.split('@')[0]))
+        if len(pending) >= 500:
+            Profile.objects.bulk_create(pending)
+            pending = []
+    if pending:
+        Profile.objects.bulk_create(pending)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_backfill_media_cached_url'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_missing_profiles, migrations.RunPython.noop),
+    ]
@@ -1,17 +1,28 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.conf import settings
+from django.db.models.functions import Lower
 from django.utils import timezone
 
+# Enables `<char field>__lower=` lookups that can use Lower() expression indexes
+models.CharField.register_lookup(Lower)
+
 # Create your models here.
 class CustomUserManager(BaseUserManager):
-    def create_user(self, email, password=None, **extra_fields):
+    def create_user(self, email, password=None, display_name='', **extra_fields):
         if not email:
             raise ValueError('The Email field must be set')
         email = self.normalize_email(email)
         user = self.model(email=email, **extra_fields)
         user.set_password(password)
-        user.save(using=self._db)
+        # User and profile are committed together, so every user created
+        # here has a profile and views can fetch it with a plain lookup
+        with transaction.atomic(using=self._db):
+            user.save(using=self._db)
+            Profile.objects.using(self._db).create(
+                user=user,
+                display_name=display_name or email.split('@')[0],
+            )
         return user
 
     def create_superuser(self, email, password=None, **extra_fields):
@@ -24,11 +35,20 @@ class CustomUser(AbstractUser):
     email = models.EmailField(unique=True)
     username = models.CharField(max_length=150, blank=True, null=True)
     
+    # Serialized users always include their profile: query them with
+    # select_related('profile') to avoid a second lookup per user
     objects = CustomUserManager()
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
     
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Case-insensitive lookups (email__lower) used when linking
+            # social logins to existing accounts
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+        ]
+    
     def __str__(self):
         return self.email
 
@@ -37,7 +57,9 @@ class Profile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='profile')
     display_name = models.CharField(max_length=150, blank=True)
     bio = models.TextField(max_length=500, blank=True)
-    avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
+    # Plain FileField: an ImageField would have Pillow fully verify the
+    # upload. The serializer checks declared type, size and the image header.
+    avatar = models.FileField(upload_to='avatars/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -46,7 +68,18 @@ class Profile(models.Model):
 
 
 class Tag(models.Model):
-    name = models.CharField(max_length=100, unique=True)
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        # Case-insensitive uniqueness; the expression index also backs
+        # `name__lower=` lookups
+        constraints = [
+            models.UniqueConstraint(Lower('name'), name='tag_name_unique_ci'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.name = self.name.strip()
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -60,11 +93,15 @@ class Post(models.Model):
     privacy = models.CharField(max_length=20, choices=[('public','Public'),('private','Private')], default='public')
     created_at = models.DateTimeField(default=timezone.now, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized counters, kept in sync by signals in users/signals.py
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['created_at']),
+            # Feed order used by PostCursorPagination
+            models.Index(fields=['-created_at','-id'], name='post_feed_idx'),
             models.Index(fields=['author','created_at'])
         ]
 
@@ -81,6 +118,9 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['post','-created_at'])
+        ]
 
     def __str__(self):
         return f"Comment by {self.author.email} on Post {self.post_id}"
@@ -99,6 +139,10 @@ class Media(models.Model):
     height = models.PositiveIntegerField(null=True, blank=True)
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='uploaded_media')
     created_at = models.DateTimeField(default=timezone.now)
+    # Storage URL resolved once when the file is stored, so listing media
+    # doesn't call storage.url() per row. Only valid for storages whose URLs
+    # don't expire (the default FileSystemStorage).
+    cached_url = models.CharField(max_length=500, blank=True, default='')
 
     class Meta:
         ordering = ['id']
@@ -106,6 +150,23 @@ class Media(models.Model):
     def __str__(self):
         return f'Media {self.id} of Post {self.post_id}'
 
+    def store_file(self):
+        """
+        Write a pending upload to storage (as pre_save would) so its final
+        name is known, and refresh cached_url if it no longer matches the
+        file. bulk_create skips save(), so batch inserts call this first.
+        """
+        # FileField.pre_save commits an uncommitted file and is a no-op for
+        # one already in storage, so calling it again from save() is safe
+        self._meta.get_field('file').pre_save(self, self._state.adding)
+        url = self.file.url if self.file else ''
+        if url != self.cached_url:
+            self.cached_url = url
+
+    def save(self, *args, **kwargs):
+        self.store_file()
+        super().save(*args, **kwargs)
+
 
 class Like(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='likes')
@@ -114,7 +175,8 @@ class Like(models.Model):
 
     class Meta:
         unique_together = ('post','user')
-        indexes = [models.Index(fields=['post','user'])]
+        # (post, user) is already covered by the unique constraint's index
+        indexes = [models.Index(fields=['user','-created_at'])]
 
     def __str__(self):
         return f'Like(post={self.post_id}, user={self.user_id})'
\ No newline at end of file
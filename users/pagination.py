@@ -0,0 +1,11 @@
+from rest_framework.pagination import CursorPagination
+
+
+class PostCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the post feed: each page is a range scan on
+    (created_at, id) from the cursor, so deep pages cost the same as the
+    first instead of growing with OFFSET. The id tie-breaker keeps posts
+    sharing a timestamp from being skipped or repeated across pages.
+    """
+    ordering = ('-created_at', '-id')
@@ -2,8 +2,11 @@
 OpenAPI schema components for drf-spectacular
 Defines reusable schemas for API documentation
 """
+from types import MappingProxyType
+
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
 from drf_spectacular.openapi import AutoSchema
-from drf_spectacular.utils import OpenApiResponse
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse
 from drf_spectacular.types import OpenApiTypes
 
 
@@ -145,8 +148,8 @@ MEDIA_BATCH_RESPONSE_SCHEMA = {
     'required': ['created', 'errors']
 }
 
-# Reusable OpenAPI response objects
-OPENAPI_RESPONSES = {
+# Reusable OpenAPI response objects (read-only: shared by every view)
+OPENAPI_RESPONSES = MappingProxyType({
     '400': OpenApiResponse(
         response=ERROR_VALIDATION_SCHEMA,
         description='Validation error - invalid request data'
@@ -167,10 +170,32 @@ OPENAPI_RESPONSES = {
         response=ERROR_THROTTLE_SCHEMA,
         description='Rate limit exceeded - too many requests'
     ),
-}
+})
+
+
+def _error_responses(*codes):
+    return MappingProxyType({code: OPENAPI_RESPONSES[code] for code in codes})
+
 
-# Schema components to be added to SPECTACULAR_SETTINGS
-SCHEMA_COMPONENTS = {
+# Error response subsets shared by the views' extend_schema declarations,
+# built once here instead of filtered per decorator
+AUTH_ERROR_RESPONSES = _error_responses('400', '401', '429')
+TOKEN_ERROR_RESPONSES = _error_responses('400', '401')
+CREATE_ERROR_RESPONSES = _error_responses('401', '429')
+OBJECT_ERROR_RESPONSES = _error_responses('401', '403', '404')
+WRITE_ERROR_RESPONSES = _error_responses('400', '401', '403', '404')
+
+# Query parameter for sparse fieldsets (see SparseFieldsMixin)
+SPARSE_FIELDS_PARAMETER = OpenApiParameter(
+    name='fields',
+    type=OpenApiTypes.STR,
+    location=OpenApiParameter.QUERY,
+    required=False,
+    description='Comma-separated top-level fields to return, e.g. id,content. Omitted fields are not loaded.',
+)
+
+# Schema components to be added to SPECTACULAR_SETTINGS (read-only)
+SCHEMA_COMPONENTS = MappingProxyType({
     'ErrorValidation': ERROR_VALIDATION_SCHEMA,
     'ErrorThrottle': ERROR_THROTTLE_SCHEMA,
     'ErrorAuthentication': ERROR_AUTHENTICATION_SCHEMA,
@@ -179,7 +204,7 @@ SCHEMA_COMPONENTS = {
     'ErrorGeneric': ERROR_GENERIC_SCHEMA,
     'TokenResponse': TOKEN_RESPONSE_SCHEMA,
     'MediaBatchResponse': MEDIA_BATCH_RESPONSE_SCHEMA,
-}
+})
 
 
 def postprocess_schema_enhancements(result, generator, request, public):
@@ -187,12 +212,14 @@ def postprocess_schema_enhancements(result, generator, request, public):
     Post-processing hook to add custom schema components to the OpenAPI schema.
     This avoids circular import issues during Django startup.
     """
-    if 'components' not in result:
-        result['components'] = {}
-    if 'schemas' not in result['components']:
-        result['components']['schemas'] = {}
+    schemas = result.setdefault('components', {}).setdefault('schemas', {})
     
     # Add our custom schema components
-    result['components']['schemas'].update(SCHEMA_COMPONENTS)
+    schemas.update(SCHEMA_COMPONENTS)
     
-    return result
\ No newline at end of file
+    return result
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """Document the caching JWT authentication as the same bearer scheme."""
+    target_class = 'users.authentication.CachedJWTAuthentication'
@@ -1,14 +1,89 @@
+from functools import cached_property
+
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Manager, prefetch_related_objects
 from .models import Profile, Post, Comment, Media, Like, Tag
-from .validators import validate_media_file
+from .validators import image_dimensions, max_media_size, validate_media_file
 
 User = get_user_model()
 
 
+# Build a serializer's readable-field list once per serializer instance.
+# DRF regenerates it on every to_representation call, which for list and
+# nested serializers means once per row. Kept as a comment so drf-spectacular
+# doesn't publish it as the description of every component using the mixin.
+class SerializerCacheMixin:
+    @cached_property
+    def _readable_fields(self):
+        return tuple(super()._readable_fields)
+
+
+def requested_fields(request):
+    """
+    Field names a client asked for with ?fields=a,b on a read request,
+    or None when the full representation is wanted.
+    """
+    if request is None or request.method != 'GET':
+        return None
+    raw = request.query_params.get('fields')
+    if not raw:
+        return None
+    return frozenset(name.strip() for name in raw.split(',') if name.strip())
+
+
+# Trim a serializer's top-level fields to those named in ?fields=.
+# Nested serializers always render in full. A comment rather than a docstring
+# so drf-spectacular doesn't publish it as the component description.
+class SparseFieldsMixin:
+    @cached_property
+    def fields(self):
+        fields = super().fields
+        parent = self.parent
+        if parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None):
+            wanted = requested_fields(self.context.get('request'))
+            if wanted:
+                for name in list(fields):
+                    if name not in wanted:
+                        fields.pop(name)
+        return fields
+
+
+class PrefetchingListSerializer(serializers.ListSerializer):
+    """
+    List serializer that batch-loads the child's declared relations
+    (Meta.select_related / Meta.prefetch_related) for every row up front.
+    Relations already loaded by the queryset are skipped, so this only
+    costs queries when the caller passed bare instances.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, Manager) else data
+        rows = list(iterable)
+        relations = declared_relations(self.child, self.child.fields)
+        if relations:
+            prefetch_related_objects(rows, *relations)
+        return super().to_representation(rows)
+
+
+def declared_relations(serializer, fields=None):
+    """
+    Relations a serializer's Meta says its fields read, joins first.
+    With ``fields``, only relations whose first hop is one of them.
+    """
+    meta = getattr(serializer, 'Meta', None)
+    relations = (*getattr(meta, 'select_related', ()), *getattr(meta, 'prefetch_related', ()))
+    if fields is None:
+        return relations
+    return tuple(rel for rel in relations if rel.split('__', 1)[0] in fields)
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
-    password = serializers.CharField(write_only=True, validators=[validate_password])
+    password = serializers.CharField(write_only=True)
     password_confirm = serializers.CharField(write_only=True)
     display_name = serializers.CharField(max_length=150, required=False)
 
@@ -16,56 +91,114 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         model = User
         fields = ('email', 'password', 'password_confirm', 'display_name')
 
+    def validate_email(self, value):
+        # Logins match emails case-insensitively, so the unique constraint on
+        # the raw column is not enough to keep them unambiguous
+        if User.objects.filter(email__lower=value.lower()).exists():
+            raise serializers.ValidationError('A user with this email already exists.')
+        return value
+
     def validate(self, attrs):
+        # Cheap mismatch check first; the password validators only run when
+        # the submission could otherwise succeed
         if attrs['password'] != attrs['password_confirm']:
             raise serializers.ValidationError("Passwords don't match")
+        try:
+            validate_password(attrs['password'], user=User(email=attrs['email']))
+        except DjangoValidationError as e:
+            raise serializers.ValidationError({'password': list(e.messages)})
         return attrs
 
     def create(self, validated_data):
         validated_data.pop('password_confirm')
         display_name = validated_data.pop('display_name', '')
         
-        user = User.objects.create_user(
+        # create_user commits the user and profile together
+        return User.objects.create_user(
             email=validated_data['email'],
-            password=validated_data['password']
+            password=validated_data['password'],
+            display_name=display_name,
         )
-        
-        # Create profile
-        Profile.objects.create(
-            user=user,
-            display_name=display_name or user.email.split('@')[0]
-        )
-        
-        return user
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, SerializerCacheMixin, serializers.ModelSerializer):
     profile = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = ('id', 'email', 'date_joined', 'profile')
         read_only_fields = ('id', 'date_joined')
+        select_related = ('profile',)
+        list_serializer_class = PrefetchingListSerializer
 
     def get_profile(self, obj) -> dict | None:
-        try:
-            profile = obj.profile
-            return {
-                'display_name': profile.display_name,
-                'bio': profile.bio,
-                'avatar': profile.avatar.url if profile.avatar else None,
-            }
-        except Profile.DoesNotExist:
+        # A missing reverse one-to-one raises an AttributeError subclass
+        profile = getattr(obj, 'profile', None)
+        if profile is None:
             return None
+        avatar = profile.avatar
+        return {
+            'display_name': profile.display_name,
+            'bio': profile.bio,
+            'avatar': avatar.url if avatar else None,
+        }
+
 
+class TokenLoginSerializer(TokenObtainPairSerializer):
+    """Access and refresh tokens together with the authenticated user."""
+    access = serializers.CharField(read_only=True)
+    refresh = serializers.CharField(read_only=True)
+    user = UserSerializer(read_only=True)
 
-class ProfileSerializer(serializers.ModelSerializer):
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        # authenticate() already loaded the user; no second lookup by email
+        data['user'] = UserSerializer(self.user).data
+        return data
+
+
+class ProfileSerializer(SerializerCacheMixin, serializers.ModelSerializer):
     class Meta:
         model = Profile
         fields = ('display_name', 'bio', 'avatar')
 
+    def validate_avatar(self, value):
+        if not value:
+            return value
+        ctype = getattr(value, 'content_type', None) or ''
+        if not ctype.startswith('image/'):
+            raise serializers.ValidationError('Avatar must be an image file')
+        max_size = max_media_size()
+        if value.size > max_size:
+            raise serializers.ValidationError(f'File exceeds maximum size of {max_size} bytes')
+        # Header-only check that the bytes really are an image; the declared
+        # type alone would let arbitrary content be stored and served
+        try:
+            image_dimensions(value)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(list(e.messages))
+        return value
+
+
+class CachedURLFileField(serializers.FileField):
+    """
+    FileField that renders the model's precomputed ``cached_url`` instead of
+    asking the storage backend, falling back to storage when it's empty.
+    """
+
+    def to_representation(self, value):
+        url = getattr(getattr(value, 'instance', None), 'cached_url', '') if value else ''
+        if not url:
+            return super().to_representation(value)
+        request = self.context.get('request', None)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
+class MediaSerializer(SerializerCacheMixin, serializers.ModelSerializer):
+    file = CachedURLFileField()
 
-class MediaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Media
         fields = ('id', 'file', 'content_type', 'size', 'width', 'height')
@@ -73,7 +206,6 @@ class MediaSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         file = validated_data['file']
-        from django.core.exceptions import ValidationError as DjangoValidationError
         try:
             meta = validate_media_file(file)
         except DjangoValidationError as e:
@@ -83,63 +215,106 @@ class MediaSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(SerializerCacheMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ('id','name')
 
 
-class CommentSerializer(serializers.ModelSerializer):
-    author = serializers.SerializerMethodField(read_only=True)
-    replies_count = serializers.IntegerField(source='replies.count', read_only=True)
+class AuthorSerializer(SerializerCacheMixin, serializers.Serializer):
+    """Compact author representation embedded in posts and comments."""
+    id = serializers.IntegerField(read_only=True)
+    email = serializers.EmailField(read_only=True)
+
+    @cached_property
+    def _rendered(self):
+        return {}
+
+    def to_representation(self, instance):
+        # One embedded instance renders the author of every row in a list,
+        # and authors repeat across a page: render each user once. Rows get
+        # their own shallow copy so editing one can't leak into the others.
+        try:
+            cached = self._rendered[instance.pk]
+        except KeyError:
+            cached = self._rendered[instance.pk] = super().to_representation(instance)
+        return dict(cached)
+
+
+class CommentSerializer(SerializerCacheMixin, serializers.ModelSerializer):
+    author = AuthorSerializer(read_only=True)
+    # Annotated by CommentViewSet.get_queryset
+    replies_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Comment
         fields = ('id','post','author','text','parent','created_at','replies_count')
         read_only_fields = ('id','author','created_at','replies_count','post')
+        select_related = ('author',)
+        list_serializer_class = PrefetchingListSerializer
 
-    def get_author(self, obj):
-        return {'id': obj.author_id, 'email': obj.author.email}
 
-
-class PostSerializer(serializers.ModelSerializer):
-    author = serializers.SerializerMethodField(read_only=True)
+class PostSerializer(SparseFieldsMixin, SerializerCacheMixin, serializers.ModelSerializer):
+    author = AuthorSerializer(read_only=True)
     media = MediaSerializer(many=True, read_only=True)
-    likes_count = serializers.IntegerField(source='likes.count', read_only=True)
-    comments_count = serializers.IntegerField(source='comments.count', read_only=True)
     tags = TagSerializer(many=True, required=False)
 
     class Meta:
         model = Post
         fields = ('id','author','title','content','privacy','tags','created_at','updated_at','media','likes_count','comments_count')
         read_only_fields = ('id','author','created_at','updated_at','media','likes_count','comments_count')
-
-    def get_author(self, obj):
-        return {'id': obj.author_id, 'email': obj.author.email}
+        select_related = ('author',)
+        prefetch_related = ('tags', 'media')
+        list_serializer_class = PrefetchingListSerializer
 
     def create(self, validated_data):
         tags_data = validated_data.pop('tags', [])
         user = self.context['request'].user
-        post = Post.objects.create(author=user, **validated_data)
-        for tag_obj in tags_data:
-            tag, _ = Tag.objects.get_or_create(name=tag_obj['name'])
-            post.tags.add(tag)
+        with transaction.atomic():
+            post = Post.objects.create(author=user, **validated_data)
+            if tags_data:
+                # A new post has no links yet: insert them straight into the
+                # through table instead of tags.add()'s existing-row check
+                Through = Post.tags.through
+                Through.objects.bulk_create(
+                    [Through(post_id=post.id, tag_id=tag.id) for tag in self.resolve_tags(tags_data)],
+                    ignore_conflicts=True,
+                )
         return post
 
     def update(self, instance, validated_data):
         tags_data = validated_data.pop('tags', None)
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
-        if tags_data is not None:
-            instance.tags.clear()
-            for tag_obj in tags_data:
-                tag, _ = Tag.objects.get_or_create(name=tag_obj['name'])
-                instance.tags.add(tag)
+        with transaction.atomic():
+            instance.save()
+            if tags_data is not None:
+                instance.tags.set(self.resolve_tags(tags_data))
         return instance
 
+    @staticmethod
+    def resolve_tags(tags_data):
+        """
+        Map incoming tag names to Tag rows, creating the missing ones.
+        Names match case-insensitively; one SELECT for the existing tags and
+        one bulk INSERT (plus a re-read) for the new ones.
+        """
+        names = {}
+        for tag_obj in tags_data:
+            name = tag_obj['name'].strip()
+            names.setdefault(name.lower(), name)
+        if not names:
+            return []
+        tags = {tag.name.lower(): tag for tag in Tag.objects.filter(name__lower__in=names)}
+        missing = [key for key in names if key not in tags]
+        if missing:
+            # ignore_conflicts: a concurrent request may have created some
+            Tag.objects.bulk_create([Tag(name=names[key]) for key in missing], ignore_conflicts=True)
+            tags.update((tag.name.lower(), tag) for tag in Tag.objects.filter(name__lower__in=missing))
+        return [tags[key] for key in names]
+
 
-class LikeSerializer(serializers.ModelSerializer):
+class LikeSerializer(SerializerCacheMixin, serializers.ModelSerializer):
     class Meta:
         model = Like
         fields = ('id','post','user','created_at')
@@ -0,0 +1,43 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Post, Like, Comment
+
+
+# Keep Post.likes_count / Post.comments_count in step with the related rows.
+# F() expressions make the update atomic in the database, so concurrent
+# likes/comments cannot lose increments.
+
+@receiver(post_save, sender=Like)
+def increment_likes_count(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(likes_count=F('likes_count') + 1)
+
+
+def _deleting_post(origin):
+    """True when the delete started from a Post (instance or queryset)."""
+    return isinstance(origin, Post) or getattr(origin, 'model', None) is Post
+
+
+@receiver(post_delete, sender=Like)
+def decrement_likes_count(sender, instance, origin=None, **kwargs):
+    # The post is going away with its likes; don't update a doomed row
+    if _deleting_post(origin):
+        return
+    # Clamped so a counter that has drifted can't fail the CHECK constraint
+    Post.objects.filter(pk=instance.post_id).update(likes_count=Greatest(F('likes_count') - 1, 0))
+
+
+@receiver(post_save, sender=Comment)
+def increment_comments_count(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(comments_count=F('comments_count') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comments_count(sender, instance, origin=None, **kwargs):
+    if _deleting_post(origin):
+        return
+    Post.objects.filter(pk=instance.post_id).update(comments_count=Greatest(F('comments_count') - 1, 0))
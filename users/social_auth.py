@@ -9,14 +9,41 @@ from drf_spectacular.types import OpenApiTypes
 
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.db import transaction
+from django.core.cache import cache
 from allauth.socialaccount.models import SocialAccount, SocialApp
 from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 from allauth.socialaccount import app_settings
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from rest_framework import serializers
 
+from .serializers import UserSerializer
+
 User = get_user_model()
 
+GOOGLE_USERINFO_URL = 'https://www.googleapis.com/oauth2/v2/userinfo'
+# Validated userinfo is reused briefly for repeat logins with the same token;
+# kept short so a revoked token stops working soon after.
+GOOGLE_USERINFO_CACHE_SECONDS = 60
+# (connect, read) timeouts. The view runs on sync gunicorn workers, so these
+# bound how long a slow or unreachable Google endpoint can hold a worker.
+GOOGLE_USERINFO_TIMEOUT = (3, 5)
+
+# Shared session so token validation reuses pooled keep-alive connections
+# to Google instead of paying a TCP + TLS handshake on every login.
+# Only failures to connect are retried (cheap, bounded by the 3s connect
+# timeout). Read timeouts, other errors and error statuses are not, so one
+# slow userinfo call holds a worker for at most one read timeout.
+_google_session = requests.Session()
+_google_session.mount('https://', HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=2, connect=2, read=0, status=0, other=0, backoff_factor=0.2),
+))
+
 
 class SocialLoginSerializer(serializers.Serializer):
     """Serializer for social login requests."""
@@ -88,7 +115,6 @@ def google_login(request):
         access_jwt = refresh.access_token
         
         # Prepare response data
-        from .serializers import UserSerializer
         user_data = UserSerializer(user).data
         
         response_data = {
@@ -112,17 +138,24 @@ def google_login(request):
 def validate_google_token(access_token):
     """
     Validate Google access token and return user information.
+    Successful lookups are cached under a hash of the token.
     """
+    cache_key = 'google-userinfo:' + hashlib.sha256(access_token.encode()).hexdigest()
+    user_info = cache.get(cache_key)
+    if user_info is not None:
+        return user_info
     try:
         # Call Google's userinfo endpoint to validate token and get user data
-        response = requests.get(
-            'https://www.googleapis.com/oauth2/v2/userinfo',
+        response = _google_session.get(
+            GOOGLE_USERINFO_URL,
             headers={'Authorization': f'Bearer {access_token}'},
-            timeout=10
+            timeout=GOOGLE_USERINFO_TIMEOUT
         )
         
         if response.status_code == 200:
-            return response.json()
+            user_info = response.json()
+            cache.set(cache_key, user_info, GOOGLE_USERINFO_CACHE_SECONDS)
+            return user_info
         else:
             return None
             
@@ -141,20 +174,26 @@ def get_or_create_user_from_google(google_user_info):
     if not email or not google_id:
         raise ValueError("Missing required user information from Google")
     
-    # First check if user already exists with this Google account
-    try:
-        social_account = SocialAccount.objects.get(
-            provider='google',
-            uid=google_id
-        )
-        return social_account.user, False
-    except SocialAccount.DoesNotExist:
-        pass
-    
-    # Check if user exists with this email
-    try:
-        user = User.objects.get(email=email)
-        created = False
+    with transaction.atomic():
+        # First check if user already exists with this Google account;
+        # the profile is joined because the login response renders it
+        social_account = (SocialAccount.objects
+                          .select_related('user__profile')
+                          .filter(provider='google', uid=google_id)
+                          .first())
+        if social_account is not None:
+            return social_account.user, False
+        
+        # Check if user exists with this email
+        try:
+            user = User.objects.select_related('profile').get(email__lower=email.lower())
+        except User.DoesNotExist:
+            # Create new user
+            return create_user_from_google(google_user_info), True
+        except User.MultipleObjectsReturned:
+            # Accounts differing only by case predate case-insensitive
+            # registration; linking one of them at random would be wrong
+            raise ValueError("Several accounts match this email")
         
         # Link Google account to existing user
         SocialAccount.objects.create(
@@ -163,13 +202,8 @@ def get_or_create_user_from_google(google_user_info):
             uid=google_id,
             extra_data=google_user_info
         )
-        
-    except User.DoesNotExist:
-        # Create new user
-        user = create_user_from_google(google_user_info)
-        created = True
     
-    return user, created
+    return user, False
 
 
 def create_user_from_google(google_user_info):
@@ -180,13 +214,15 @@ def create_user_from_google(google_user_info):
     first_name = google_user_info.get('given_name', '')
     last_name = google_user_info.get('family_name', '')
     google_id = google_user_info.get('id')
+    name = google_user_info.get('name', '') or f"{first_name} {last_name}".strip()
     
-    # Create user
+    # Create user (create_user also creates the profile)
     user = User.objects.create_user(
         email=email,
         first_name=first_name,
         last_name=last_name,
         password=None,  # No password for social users
+        display_name=name,
     )
     
     # Create social account
@@ -197,30 +233,4 @@ def create_user_from_google(google_user_info):
         extra_data=google_user_info
     )
     
-    # Ensure profile exists (create if signal didn't trigger)
-    from .models import Profile
-    if not hasattr(user, 'profile'):
-        name = google_user_info.get('name', '')
-        if not name:
-            name = f"{first_name} {last_name}".strip()
-        if not name:
-            name = email.split('@')[0]
-            
-        Profile.objects.create(
-            user=user,
-            display_name=name,
-            bio='',
-        )
-    else:
-        # Update profile display name if not set
-        profile = user.profile
-        if not profile.display_name:
-            name = google_user_info.get('name', '')
-            if not name:
-                name = f"{first_name} {last_name}".strip()
-            if not name:
-                name = email.split('@')[0]
-            profile.display_name = name
-            profile.save()
-    
     return user
\ No newline at end of file
@@ -11,6 +11,19 @@ from rest_framework.routers import DefaultRouter
 router = DefaultRouter()
 router.register('posts', PostViewSet, basename='post')
 
+comment_list = CommentViewSet.as_view({'get':'list','post':'create'})
+comment_detail = CommentViewSet.as_view({'delete':'destroy','put':'update','patch':'partial_update'})
+
+# Routes under posts/<post_pk>/: the resolver matches the prefix once and
+# then only scans these
+post_nested_patterns = [
+    path('comments/', comment_list, name='comment-list-create'),
+    path('comments/<int:pk>/', comment_detail, name='comment-detail'),
+    path('media/', MediaUploadView.as_view(), name='media-upload'),
+    path('media/batch/', MediaBatchUploadView.as_view(), name='media-batch-upload'),
+    path('media/<int:pk>/', MediaDetailView.as_view(), name='media-detail'),
+]
+
 urlpatterns = [
     # Auth endpoints
     path('auth/register/', RegisterView.as_view(), name='register'),
@@ -27,9 +40,5 @@ urlpatterns = [
 
     # Post + nested endpoints
     path('', include(router.urls)),
-    path('posts/<int:post_pk>/comments/', CommentViewSet.as_view({'get':'list','post':'create'}), name='comment-list-create'),
-    path('posts/<int:post_pk>/comments/<int:pk>/', CommentViewSet.as_view({'delete':'destroy','put':'update','patch':'partial_update'}), name='comment-detail'),
-    path('posts/<int:post_pk>/media/', MediaUploadView.as_view(), name='media-upload'),
-    path('posts/<int:post_pk>/media/batch/', MediaBatchUploadView.as_view(), name='media-batch-upload'),
-    path('posts/<int:post_pk>/media/<int:pk>/', MediaDetailView.as_view(), name='media-detail'),
+    path('posts/<int:post_pk>/', include(post_nested_patterns)),
 ]
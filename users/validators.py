@@ -1,7 +1,49 @@
+from functools import lru_cache
+
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from PIL import Image
-from io import BytesIO
+
+
+@lru_cache(maxsize=1)
+def max_media_size():
+    """Largest accepted upload in bytes, for media and avatars alike."""
+    return getattr(settings, 'MEDIA_MAX_SIZE', 5 * 1024 * 1024)
+
+
+@lru_cache(maxsize=1)
+def _allowed_types():
+    """Split the allowed list into exact types and 'type/*' wildcard prefixes."""
+    allowed = getattr(settings, 'MEDIA_ALLOWED_CONTENT_TYPES', [])
+    exact = frozenset(t for t in allowed if '*' not in t)
+    prefixes = tuple(t[:-1] for t in allowed if t.endswith('/*'))
+    return exact, prefixes
+
+
+@receiver(setting_changed)
+def _reset_media_settings(setting, **kwargs):
+    # Keep override_settings working in tests
+    if setting in ('MEDIA_MAX_SIZE', 'MEDIA_ALLOWED_CONTENT_TYPES'):
+        max_media_size.cache_clear()
+        _allowed_types.cache_clear()
+
+
+def image_dimensions(uploaded_file):
+    """
+    Return (width, height) from the image header, or raise ValidationError.
+    Pillow's open() is lazy: it reads only as far as the header, however
+    much metadata (ICC, EXIF, XMP) precedes it, and never decodes pixels.
+    """
+    try:
+        uploaded_file.seek(0)
+        with Image.open(uploaded_file) as img:
+            return img.size
+    except Exception:
+        raise ValidationError('Invalid image file')
+    finally:
+        uploaded_file.seek(0)
 
 
 def validate_media_file(uploaded_file):
@@ -9,33 +51,24 @@ def validate_media_file(uploaded_file):
     Returns a metadata dict (content_type, size, width, height) for images.
     Raises ValidationError on failure.
     """
-    max_size = getattr(settings, 'MEDIA_MAX_SIZE', 5 * 1024 * 1024)
-    allowed = set(getattr(settings, 'MEDIA_ALLOWED_CONTENT_TYPES', []))
+    max_size = max_media_size()
+    exact, prefixes = _allowed_types()
 
-    size = getattr(uploaded_file, 'size', 0)
     ctype = getattr(uploaded_file, 'content_type', None) or ''
+    # Type first: rejecting a disallowed upload is a set lookup (plus a
+    # startswith scan for wildcards) and never needs the file's size
+    if (exact or prefixes) and ctype not in exact and not ctype.startswith(prefixes):
+        raise ValidationError(f'Unsupported content type: {ctype}')
 
+    size = getattr(uploaded_file, 'size', 0)
     if size == 0:
         raise ValidationError('Empty file upload is not allowed')
     if size > max_size:
         raise ValidationError(f'File exceeds maximum size of {max_size} bytes')
-    if allowed and ctype not in allowed:
-        raise ValidationError(f'Unsupported content type: {ctype}')
 
     width = height = None
     if ctype.startswith('image/'):
-        try:
-            # Pillow can handle file-like; ensure pointer at start
-            pos = uploaded_file.tell() if hasattr(uploaded_file, 'tell') else None
-            if hasattr(uploaded_file, 'seek'):
-                uploaded_file.seek(0)
-            img = Image.open(uploaded_file)
-            width, height = img.size
-            img.verify()  # Validate image integrity
-            if hasattr(uploaded_file, 'seek') and pos is not None:
-                uploaded_file.seek(pos)
-        except Exception:
-            raise ValidationError('Invalid image file')
+        width, height = image_dimensions(uploaded_file)
 
     return {
         'content_type': ctype,
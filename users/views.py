@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
@@ -6,10 +8,13 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from .serializers import (
     UserRegistrationSerializer, UserSerializer, ProfileSerializer,
-    PostSerializer, CommentSerializer, MediaSerializer, LikeSerializer
+    PostSerializer, CommentSerializer, MediaSerializer, LikeSerializer,
+    TokenLoginSerializer, SparseFieldsMixin, requested_fields
 )
 from .models import Profile, Post, Comment, Media, Like
 from .validators import validate_media_file
+from .pagination import PostCursorPagination
+from .authentication import forget_token
 from rest_framework import viewsets, mixins
 from rest_framework.decorators import action
 from users.throttles import (
@@ -17,11 +22,45 @@ from users.throttles import (
     PostCreateThrottle, CommentCreateThrottle
 )
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiResponse, OpenApiExample
-from django.db.models import Q
-from .schemas import OPENAPI_RESPONSES
+from django.db import IntegrityError, transaction
+from django.shortcuts import get_object_or_404
+from django.db.models import Count, Q
+from .schemas import (
+    OPENAPI_RESPONSES, AUTH_ERROR_RESPONSES, TOKEN_ERROR_RESPONSES, CREATE_ERROR_RESPONSES,
+    OBJECT_ERROR_RESPONSES, WRITE_ERROR_RESPONSES, SPARSE_FIELDS_PARAMETER
+)
 
 User = get_user_model()
 
+# Upper bound on threads validating and storing files for one batch upload
+MEDIA_BATCH_WORKERS = 8
+
+
+# Apply the select_related/prefetch_related declared on the serializer's
+# Meta to the view's queryset, so the relations a serializer reads are
+# declared next to its fields instead of in every view that uses it.
+# Relations behind fields left out by ?fields= are not loaded.
+# Kept as a comment: drf-spectacular would publish a docstring here as the
+# description of every operation on views that lack their own.
+class SerializerPrefetchMixin:
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        meta = getattr(serializer_class, 'Meta', None)
+        select = getattr(meta, 'select_related', ())
+        prefetch = getattr(meta, 'prefetch_related', ())
+        wanted = None
+        if issubclass(serializer_class, SparseFieldsMixin):
+            wanted = requested_fields(self.request)
+        if wanted:
+            select = [rel for rel in select if rel.split('__', 1)[0] in wanted]
+            prefetch = [rel for rel in prefetch if rel.split('__', 1)[0] in wanted]
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
 
 @extend_schema_view(
     post=extend_schema(
@@ -85,24 +124,12 @@ class RegisterView(generics.CreateAPIView):
                 'user': {'id': 1, 'email': 'user@example.com', 'display_name': 'User'}
             })]
         ),
-        **{k: v for k, v in OPENAPI_RESPONSES.items() if k in ['400', '401', '429']}
+        **AUTH_ERROR_RESPONSES
     }
 )
 class LoginView(TokenObtainPairView):
     """Custom login view that returns user data along with tokens"""
-    
-    def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-        if response.status_code == 200:
-            # Get user from email
-            email = request.data.get('email')
-            if email:
-                try:
-                    user = User.objects.get(email=email)
-                    response.data['user'] = UserSerializer(user).data
-                except User.DoesNotExist:
-                    pass
-        return response
+    serializer_class = TokenLoginSerializer
 
 
 @extend_schema(
@@ -117,7 +144,7 @@ class LoginView(TokenObtainPairView):
             description='Logout successful',
             examples=[OpenApiExample('Success', value={'message': 'Successfully logged out'})]
         ),
-        **{k: v for k, v in OPENAPI_RESPONSES.items() if k in ['400', '401']}
+        **TOKEN_ERROR_RESPONSES
     }
 )
 @api_view(['POST'])
@@ -128,6 +155,10 @@ def logout_view(request):
         if refresh_token:
             token = RefreshToken(refresh_token)
             token.blacklist()
+        # The access token used for this request stops short-cutting verification
+        header = request.META.get('HTTP_AUTHORIZATION', '').split()
+        if len(header) == 2:
+            forget_token(header[1])
         return Response({'message': 'Successfully logged out'}, status=status.HTTP_200_OK)
     except Exception:
         return Response({'error': 'Invalid token'}, status=status.HTTP_400_BAD_REQUEST)
@@ -148,7 +179,7 @@ def logout_view(request):
                 'refresh': 'eyJ0eXAiOiJKV1QiLCJhbGciOiJIUzI1NiJ9...'
             })]
         ),
-        **{k: v for k, v in OPENAPI_RESPONSES.items() if k in ['400', '401']}
+        **TOKEN_ERROR_RESPONSES
     }
 )
 class CustomTokenRefreshView(TokenRefreshView):
@@ -156,7 +187,8 @@ class CustomTokenRefreshView(TokenRefreshView):
     pass
 
 
-class UserDetailView(generics.RetrieveAPIView):
+@extend_schema_view(get=extend_schema(parameters=[SPARSE_FIELDS_PARAMETER]))
+class UserDetailView(SerializerPrefetchMixin, generics.RetrieveAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -167,10 +199,22 @@ class ProfileUpdateView(generics.UpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        profile, created = Profile.objects.get_or_create(user=self.request.user)
+        # Profiles are created with their user (CustomUserManager.create_user)
+        profile = get_object_or_404(Profile, user=self.request.user)
+        # Reuse the authenticated user instead of lazily re-fetching it
+        profile.user = self.request.user
         return profile
 
 
+def _get_accessible_post(post_id, user):
+    """
+    Return the post if the user may see it (public, or their own), else 404.
+    Only the columns the privacy check needs are loaded.
+    """
+    visible = Post.objects.filter(Q(privacy='public') | Q(author=user))
+    return get_object_or_404(visible.only('id', 'author_id', 'privacy'), id=post_id)
+
+
 class IsOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
@@ -277,10 +321,14 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
     list=extend_schema(
         tags=['posts'],
         summary='List posts',
-        description='Retrieve a list of posts. Users see their own posts plus public posts.',
+        description=(
+            'Retrieve a list of posts, newest first. Users see their own posts plus public posts. '
+            'Pages are cursor-based: follow the next/previous links.'
+        ),
+        parameters=[SPARSE_FIELDS_PARAMETER],
         responses={
             200: OpenApiResponse(description='List of posts', response=PostSerializer(many=True)),
-            **{k: v for k, v in OPENAPI_RESPONSES.items() if k in ['401', '429']}
+            **CREATE_ERROR_RESPONSES
         }
     ),
     create=extend_schema(
@@ -303,9 +351,10 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         tags=['posts'],
         summary='Retrieve a post',
         description='Get details of a specific post.',
+        parameters=[SPARSE_FIELDS_PARAMETER],
         responses={
             200: OpenApiResponse(description='Post details', response=PostSerializer),
-            **{k: v for k, v in OPENAPI_RESPONSES.items() if k in ['401', '403', '404']}
+            **OBJECT_ERROR_RESPONSES
         }
     ),
     update=extend_schema(
@@ -321,7 +370,7 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
                     'message': 'Post updated successfully'
                 })]
             ),
-            **{k: v for k, v in OPENAPI_RESPONSES.items() if k in ['400', '401', '403', '404']}
+            **WRITE_ERROR_RESPONSES
         }
     ),
     destroy=extend_schema(
@@ -330,13 +379,14 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         description='Delete a post. Only the author can delete their posts.',
         responses={
             204: OpenApiResponse(description='Post deleted successfully'),
-            **{k: v for k, v in OPENAPI_RESPONSES.items() if k in ['401', '403', '404']}
+            **OBJECT_ERROR_RESPONSES
         }
     )
 )
-class PostViewSet(viewsets.ModelViewSet):
-    queryset = Post.objects.select_related('author').prefetch_related('tags','media')
+class PostViewSet(SerializerPrefetchMixin, viewsets.ModelViewSet):
+    queryset = Post.objects.all()
     serializer_class = PostSerializer
+    pagination_class = PostCursorPagination
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
 
     def get_queryset(self):
@@ -365,8 +415,10 @@ class PostViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
-        headers = self.get_success_headers(serializer.data)
-        data = dict(serializer.data)
+        # serializer.data builds a new ReturnDict on every access; take it
+        # once and add the message to that
+        data = serializer.data
+        headers = self.get_success_headers(data)
         data['message'] = 'Post created successfully'
         return Response(data, status=status.HTTP_201_CREATED, headers=headers)
 
@@ -376,7 +428,7 @@ class PostViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
-        data = dict(serializer.data)
+        data = serializer.data
         data['message'] = 'Post updated successfully'
         return Response(data)
 
@@ -387,18 +439,30 @@ class PostViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def like(self, request, pk=None):
         post = self.get_object()
-        like, created = Like.objects.get_or_create(post=post, user=request.user)
-        if not created:
-            like.delete()
-            return Response({'liked': False, 'likes_count': post.likes.count(), 'message': 'Like removed'})
-        return Response({'liked': True, 'likes_count': post.likes.count(), 'message': 'Post liked'})
+        with transaction.atomic():
+            # Unlike if a like exists; otherwise like. A concurrent duplicate
+            # like hits the unique constraint and settles on "liked".
+            deleted, _ = Like.objects.filter(post=post, user=request.user).delete()
+            if not deleted:
+                try:
+                    with transaction.atomic():
+                        Like.objects.create(post=post, user=request.user)
+                except IntegrityError:
+                    pass
+            # The Like signals keep the counter current; read it back instead of COUNT(*)
+            post.refresh_from_db(fields=['likes_count'])
+        if deleted:
+            return Response({'liked': False, 'likes_count': post.likes_count, 'message': 'Like removed'})
+        return Response({'liked': True, 'likes_count': post.likes_count, 'message': 'Post liked'})
 
 
-class CommentViewSet(viewsets.GenericViewSet,
+class CommentViewSet(SerializerPrefetchMixin,
+                     viewsets.GenericViewSet,
                      mixins.CreateModelMixin,
                      mixins.DestroyModelMixin,
                      mixins.UpdateModelMixin,
                      mixins.ListModelMixin):
+    queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
 
@@ -414,21 +478,23 @@ class CommentViewSet(viewsets.GenericViewSet,
 
     def get_queryset(self):
         post_id = self.kwargs.get('post_pk')
-        return Comment.objects.filter(post_id=post_id).select_related('author')
+        # Only the columns CommentSerializer renders; the author join
+        # (select_related from the serializer's Meta) skips password etc.
+        return (super().get_queryset()
+                .filter(post_id=post_id)
+                .only('id', 'post_id', 'text', 'parent_id', 'created_at', 'author__id', 'author__email')
+                .annotate(replies_count=Count('replies'))
+                # The GROUP BY from annotate() drops Meta.ordering; restore it
+                # with a pk tiebreaker so pages are stable
+                .order_by('created_at', 'id'))
 
     def perform_create(self, serializer):
         post_id = self.kwargs.get('post_pk')
         # Validate post exists and user can access it (respects privacy)
-        try:
-            post = Post.objects.get(id=post_id)
-            # Check if user can access this post (privacy rules)
-            if post.privacy == 'private' and post.author != self.request.user:
-                from django.http import Http404
-                raise Http404("Post not found")
-        except Post.DoesNotExist:
-            from django.http import Http404
-            raise Http404("Post not found")
-        serializer.save(author=self.request.user, post_id=post_id)
+        _get_accessible_post(post_id, self.request.user)
+        comment = serializer.save(author=self.request.user, post_id=post_id)
+        # Not loaded through get_queryset, so set the annotation by hand
+        comment.replies_count = 0
 
     def get_throttles(self):
         if self.action == 'create':
@@ -447,15 +513,7 @@ class MediaUploadView(generics.CreateAPIView):
     def perform_create(self, serializer):
         post_id = self.kwargs.get('post_pk')
         # Validate post exists and user can access it
-        try:
-            post = Post.objects.get(id=post_id)
-            # Check if user can access this post (privacy rules)
-            if post.privacy == 'private' and post.author != self.request.user:
-                from django.http import Http404
-                raise Http404("Post not found")
-        except Post.DoesNotExist:
-            from django.http import Http404
-            raise Http404("Post not found")
+        _get_accessible_post(post_id, self.request.user)
         serializer.save(post_id=post_id)
 
 
@@ -506,7 +564,7 @@ class MediaUploadView(generics.CreateAPIView):
                     ]
                 })]
             ),
-            **{k: v for k, v in OPENAPI_RESPONSES.items() if k in ['400', '401', '403', '404']}
+            **WRITE_ERROR_RESPONSES
         }
     )
 )
@@ -517,36 +575,33 @@ class MediaBatchUploadView(generics.GenericAPIView):
     def post(self, request, *args, **kwargs):
         post_id = self.kwargs.get('post_pk')
         # Validate post exists and user can access it
-        try:
-            post = Post.objects.get(id=post_id)
-            # Check if user can access this post (privacy rules)
-            if post.privacy == 'private' and post.author != self.request.user:
-                from django.http import Http404
-                raise Http404("Post not found")
-        except Post.DoesNotExist:
-            from django.http import Http404
-            raise Http404("Post not found")
-            
+        _get_accessible_post(post_id, self.request.user)
+
         files = request.FILES.getlist('files')
         if not files:
             return Response({'error':'No files provided'}, status=status.HTTP_400_BAD_REQUEST)
-        created = []
-        errors = []
-        for f in files:
-            try:
-                meta = validate_media_file(f)
-                media = Media.objects.create(
-                    post_id=post_id,
-                    file=f,
-                    uploaded_by=request.user,
-                    **meta
-                )
-                created.append(MediaSerializer(media).data)
-            except Exception as e:
-                errors.append({'filename': getattr(f,'name',''), 'error': str(e)})
+        # Validation and storage writes are I/O bound and independent per
+        # file, so they overlap; map() keeps results in upload order
+        with ThreadPoolExecutor(max_workers=min(MEDIA_BATCH_WORKERS, len(files))) as pool:
+            results = list(pool.map(lambda f: self._process_one(f, post_id, request.user), files))
+        to_create = [media for media, error in results if media is not None]
+        errors = [error for media, error in results if error is not None]
+        # One INSERT for the whole batch
+        created = MediaSerializer(Media.objects.bulk_create(to_create), many=True).data
         status_code = status.HTTP_207_MULTI_STATUS if errors else status.HTTP_201_CREATED
         return Response({'created': created, 'errors': errors}, status=status_code)
 
+    @staticmethod
+    def _process_one(f, post_id, user):
+        """Validate and store one upload; returns (unsaved Media, None) or (None, error)."""
+        try:
+            meta = validate_media_file(f)
+            media = Media(post_id=post_id, file=f, uploaded_by=user, **meta)
+            media.store_file()
+            return media, None
+        except Exception as e:
+            return None, {'filename': getattr(f,'name',''), 'error': str(e)}
+
 
 class MediaDetailView(generics.RetrieveDestroyAPIView):
     serializer_class = MediaSerializer
@@ -554,12 +609,18 @@ class MediaDetailView(generics.RetrieveDestroyAPIView):
     
     def get_queryset(self):
         post_id = self.kwargs.get('post_pk')
-        return Media.objects.filter(post_id=post_id)
+        # Join the post for its author_id; the ownership check compares ids,
+        # so neither user row is loaded
+        return (Media.objects.filter(post_id=post_id)
+                .select_related('post')
+                .only('id', 'file', 'content_type', 'size', 'width', 'height', 'cached_url',
+                      'uploaded_by_id', 'post__id', 'post__author_id'))
     
     def get_object(self):
         obj = super().get_object()
         # Check permission: either post author or media uploader
-        if obj.post.author != self.request.user and obj.uploaded_by != self.request.user:
+        user_id = self.request.user.pk
+        if obj.post.author_id != user_id and obj.uploaded_by_id != user_id:
             from django.http import Http404
             raise Http404("Media not found")
         return obj
@@ -3,112 +3,124 @@
 Quick validation script for P5 Documentation Enhancements
 Tests that enhanced error schemas and documentation are working correctly.
 """
-import requests
-import json
+import atexit
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
 
 BASE_URL = "http://127.0.0.1:8000"
 
-def test_api_docs():
+# One pooled, keep-alive session for every request the script makes
+SESSION = requests.Session()
+atexit.register(SESSION.close)
+
+# Checks are built once rather than per endpoint/method
+EXPECTED_SCHEMAS = frozenset({
+    'ErrorValidation', 'ErrorThrottle', 'ErrorAuthentication',
+    'ErrorPermission', 'ErrorNotFound', 'TokenResponse', 'MediaBatchResponse'
+})
+ERROR_CODES = frozenset({'400', '401', '403', '404', '429'})
+METHODS = ('post', 'get', 'put', 'patch', 'delete')
+TEST_ENDPOINTS = (
+    '/api/auth/register/',
+    '/api/auth/token/',
+    '/api/auth/token/refresh/',
+    '/api/posts/',
+)
+
+def _fetch(path, **kwargs):
+    """GET a path, returning the response or the exception raised."""
+    try:
+        return SESSION.get(f"{BASE_URL}{path}", **kwargs)
+    except requests.RequestException as e:
+        return e
+
+def fetch_all():
+    """Fetch the docs page and the schema (as JSON) concurrently, once each."""
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        docs = pool.submit(_fetch, "/api/docs/")
+        # The schema view renders YAML unless JSON is asked for
+        schema = pool.submit(_fetch, "/api/schema/", headers={'Accept': 'application/json'})
+        return docs.result(), schema.result()
+
+def load_schema(response):
+    """Parse the schema response once; returns the dict or None."""
+    if isinstance(response, Exception) or response.status_code != 200:
+        return None
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+def test_api_docs(response):
     """Test that API documentation is accessible"""
     print("Testing API Documentation...")
-    try:
-        response = requests.get(f"{BASE_URL}/api/docs/")
-        if response.status_code == 200:
-            print("✅ API docs accessible at /api/docs/")
-            return True
-        else:
-            print(f"❌ API docs failed: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"❌ API docs error: {e}")
+    if isinstance(response, Exception):
+        print(f"❌ API docs error: {response}")
+        return False
+    if response.status_code == 200:
+        print("✅ API docs accessible at /api/docs/")
+        return True
+    else:
+        print(f"❌ API docs failed: {response.status_code}")
         return False
 
-def test_schema_endpoint():
+def test_schema_endpoint(response, schema):
     """Test that OpenAPI schema is generated with our enhancements"""
     print("Testing OpenAPI Schema...")
-    try:
-        response = requests.get(f"{BASE_URL}/api/schema/")
-        if response.status_code == 200:
-            schema = response.json()
-            
-            # Check if our custom components are present
-            components = schema.get('components', {}).get('schemas', {})
-            expected_schemas = [
-                'ErrorValidation', 'ErrorThrottle', 'ErrorAuthentication',
-                'ErrorPermission', 'ErrorNotFound', 'TokenResponse', 'MediaBatchResponse'
-            ]
-            
-            found_schemas = []
-            missing_schemas = []
-            
-            for schema_name in expected_schemas:
-                if schema_name in components:
-                    found_schemas.append(schema_name)
-                else:
-                    missing_schemas.append(schema_name)
-            
-            print(f"✅ Schema endpoint accessible: {len(schema)} top-level keys")
-            print(f"✅ Found custom schemas: {found_schemas}")
-            
-            if missing_schemas:
-                print(f"⚠️  Missing schemas: {missing_schemas}")
-            else:
-                print("✅ All custom error schemas present")
-            
-            return True
-        else:
-            print(f"❌ Schema endpoint failed: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"❌ Schema endpoint error: {e}")
+    if isinstance(response, Exception):
+        print(f"❌ Schema endpoint error: {response}")
         return False
+    if schema is None:
+        print(f"❌ Schema endpoint failed: {response.status_code}")
+        return False
+    
+    # Check if our custom components are present
+    components = schema.get('components', {}).get('schemas', {})
+    found_schemas = sorted(EXPECTED_SCHEMAS.intersection(components))
+    missing_schemas = sorted(EXPECTED_SCHEMAS.difference(components))
+    
+    print(f"✅ Schema endpoint accessible: {len(schema)} top-level keys")
+    print(f"✅ Found custom schemas: {found_schemas}")
+    
+    if missing_schemas:
+        print(f"⚠️  Missing schemas: {missing_schemas}")
+    else:
+        print("✅ All custom error schemas present")
+    
+    return True
 
-def test_enhanced_endpoint_documentation():
+def test_enhanced_endpoint_documentation(schema):
     """Test that endpoints have enhanced error response documentation"""
     print("Testing Enhanced Endpoint Documentation...")
-    try:
-        response = requests.get(f"{BASE_URL}/api/schema/")
-        if response.status_code != 200:
-            print("❌ Cannot fetch schema for endpoint testing")
-            return False
-            
-        schema = response.json()
-        paths = schema.get('paths', {})
-        
-        # Check specific endpoints for enhanced documentation
-        test_endpoints = [
-            '/api/auth/register/',
-            '/api/auth/token/',
-            '/api/auth/token/refresh/',
-            '/api/posts/',
-        ]
-        
-        enhanced_count = 0
-        for endpoint in test_endpoints:
-            if endpoint in paths:
-                path_info = paths[endpoint]
-                methods = ['post', 'get', 'put', 'patch', 'delete']
-                
-                for method in methods:
-                    if method in path_info:
-                        responses = path_info[method].get('responses', {})
-                        error_codes = [code for code in responses.keys() if code in ['400', '401', '403', '404', '429']]
-                        
-                        if error_codes:
-                            enhanced_count += 1
-                            print(f"✅ {method.upper()} {endpoint}: error responses {error_codes}")
-                            break
+    if schema is None:
+        print("❌ Cannot fetch schema for endpoint testing")
+        return False
         
-        if enhanced_count > 0:
-            print(f"✅ Enhanced documentation found on {enhanced_count} endpoints")
-            return True
-        else:
-            print("⚠️  No enhanced error documentation found")
-            return False
+    paths = schema.get('paths', {})
+    
+    # Check specific endpoints for enhanced documentation
+    enhanced_count = 0
+    for endpoint in TEST_ENDPOINTS:
+        if endpoint in paths:
+            path_info = paths[endpoint]
             
-    except Exception as e:
-        print(f"❌ Endpoint documentation test error: {e}")
+            for method in METHODS:
+                if method in path_info:
+                    responses = path_info[method].get('responses', {})
+                    error_codes = sorted(ERROR_CODES.intersection(responses))
+                    
+                    if error_codes:
+                        enhanced_count += 1
+                        print(f"✅ {method.upper()} {endpoint}: error responses {error_codes}")
+                        break
+    
+    if enhanced_count > 0:
+        print(f"✅ Enhanced documentation found on {enhanced_count} endpoints")
+        return True
+    else:
+        print("⚠️  No enhanced error documentation found")
         return False
 
 def main():
@@ -116,10 +128,13 @@ def main():
     print("P5 Documentation Enhancements - Validation Tests")
     print("=" * 50)
     
+    # One round of requests shared by every check
+    docs_response, schema_response = fetch_all()
+    schema = load_schema(schema_response)
     tests = [
-        test_api_docs,
-        test_schema_endpoint,
-        test_enhanced_endpoint_documentation,
+        lambda: test_api_docs(docs_response),
+        lambda: test_schema_endpoint(schema_response, schema),
+        lambda: test_enhanced_endpoint_documentation(schema),
     ]
     
     passed = 0